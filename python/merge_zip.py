@@ -1,5 +1,20 @@
 #!/usr/bin/env python3
-import argparse, os, sys, time, fnmatch, shutil, shutil, zipfile, math, subprocess
+import argparse, os, re, sys, time, fnmatch, glob, shutil, shutil, zipfile, math, subprocess, struct, contextlib, collections, errno, queue, threading, concurrent.futures, operator
+
+try:  # optional: ISA-L accelerated deflate/inflate/crc32 (pip install isal)
+    from isal import isal_zlib
+except ImportError:
+    isal_zlib = None
+
+try:  # optional: --backend libarchive (pip install libarchive-c)
+    import libarchive
+except ImportError:
+    libarchive = None
+
+def use_isal():
+    # zipfile looks up zlib.compressobj/decompressobj and crc32 from its module globals at call time
+    zipfile.zlib = isal_zlib
+    zipfile.crc32 = isal_zlib.crc32
 
 def human(n: int) -> str:
     units = ["B","KB","MB","GB","TB"]
@@ -22,89 +37,325 @@ def parse_args():
     g = p.add_mutually_exclusive_group()
     g.add_argument("--store", action="store_true", help="No compression")
     g.add_argument("--deflate", action="store_true", help="Deflate compression (default)")
+    p.add_argument("--compresslevel", type=int, default=1, choices=range(0, 10), metavar="0-9",
+                   help="Deflate level when recompressing (default 1 = fastest)")
+    p.add_argument("--passthrough", action=argparse.BooleanOptionalAction, default=None,
+                   help="Copy compressed entries as-is, no recompression (default: on unless --store)")
+    p.add_argument("--jobs", type=int, default=1, help="Worker threads: read/inflate input ZIPs and write raw split parts in parallel (default 1)")
+    p.add_argument("--isal", action="store_true", help="Use ISA-L (python-isal) for deflate/inflate/CRC if installed")
+    p.add_argument("--backend", default="zipfile", choices=["zipfile","libarchive"],
+                   help="Reader for input ZIPs; libarchive streams each file once (implies --no-passthrough, no --jobs)")
     p.add_argument("--chunk-mb", type=int, default=4, help="I/O block size MB (default 4)")
     p.add_argument("--prefix-by-zip", action="store_true", help="Put entries under <zipname>/... (default: keep root)")
     p.add_argument("--split-size", default=None, help="Split result: e.g. 1900m, 2g (raw by default)")
-    p.add_argument("--split-mode", default="zip", choices=["zip","raw"], help="zip -> 'zip -s', raw -> split file (default zip)")
+    p.add_argument("--split-mode", default="raw", choices=["zip","raw"],
+                   help="raw -> split file, zero-copy (default); zip -> 'zip -s' (legacy, writes a second full copy)")
     p.add_argument("--rm-after-split", action="store_true", help="Remove the big zip after splitting")
     return p.parse_args()
 
+_SIZE_RE = re.compile(r"\s*(\d+(?:\.\d*)?|\.\d+)\s*([kmgt]?)b?\s*", re.I)
+_SIZE_MUL = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+
 def parse_size(s: str) -> int:
-    s = s.strip().lower()
-    if not s:
+    if not s.strip():
         return 0
-    num = "".join(ch for ch in s if ch.isdigit())
-    suf = s[len(num):].strip()
-    if not num:
+    m = _SIZE_RE.fullmatch(s)
+    if not m:
         raise ValueError("Invalid size")
-    n = int(num)
-    mul = 1
-    if suf in ("k","kb"):
-        mul = 1024
-    elif suf in ("m","mb"):
-        mul = 1024*1024
-    elif suf in ("g","gb"):
-        mul = 1024*1024*1024
-    elif suf in ("t","tb"):
-        mul = 1024*1024*1024*1024
-    return n*mul
+    return int(float(m.group(1)) * _SIZE_MUL[m.group(2).lower()])
 
 def list_zips(input_dir, pattern):
-    names = [f for f in os.listdir(input_dir) if f.lower().endswith(".zip") and fnmatch.fnmatch(f, pattern)]
+    # same matching as fnmatch.fnmatch, compiled once; scandir's d_type skips a stat() per entry
+    pat = re.compile(fnmatch.translate(os.path.normcase(pattern)))
+    with os.scandir(input_dir) as it:
+        names = [e.name for e in it if e.name.lower().endswith(".zip") and pat.match(os.path.normcase(e.name)) and e.is_file()]
     names.sort()
     return names
 
-def zip_compressed_size(path):
-    total = 0
-    with zipfile.ZipFile(path, 'r', allowZip64=True) as z:
-        for it in z.infolist():
-            if it.is_dir(): continue
-            total += max(0, getattr(it, "compress_size", 0))
-    return total
-
-def zip_compressed_total(paths):
-    total = 0
-    for p in paths:
-        with zipfile.ZipFile(p, 'r', allowZip64=True) as z:
-            for it in z.infolist():
-                if not it.is_dir():
-                    total += max(0, getattr(it, "compress_size", 0))
-    return total
-
-def zip_uncompressed_size(path):
-    total = 0
-    with zipfile.ZipFile(path, 'r', allowZip64=True) as z:
-        for it in z.infolist():
-            if it.is_dir(): continue
-            total += max(0, getattr(it, "file_size", 0))
-    return total
-
-def raw_split(path: str, part_size_str: str, rm_after: bool):
+def wanted(item):
+    fn = item.filename
+    return not (item.is_dir() or fn.startswith("__MACOSX/") or fn.endswith(".DS_Store"))
+
+_file_size = operator.attrgetter("file_size")
+_compress_size = operator.attrgetter("compress_size")
+
+def zip_stats(z):
+    # one pass over an already-open ZipFile: (entries to copy, uncompressed total, compressed total)
+    infos = [it for it in z.infolist() if wanted(it)]
+    return infos, sum(map(_file_size, infos)), sum(map(_compress_size, infos))
+
+def open_input(zpath, raw):
+    # raw (passthrough) reads only need the file itself; inflating needs a ZipFile
+    src = open(zpath, "rb") if raw else zipfile.ZipFile(zpath, 'r', allowZip64=True)
+    fadvise(src if raw else src.fp, 0, 0, "POSIX_FADV_SEQUENTIAL")  # bigger readahead
+    return src
+
+def read_raw(fp, item, mv):
+    # Yield the compressed payload as stored in the input (no inflate)
+    fp.seek(item.header_offset)
+    fh = struct.unpack(zipfile.structFileHeader, fp.read(zipfile.sizeFileHeader))
+    if fh[zipfile._FH_SIGNATURE] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Bad magic number for file header: {item.filename}")
+    # local header name/extra lengths may differ from the central directory copy
+    fp.seek(fh[zipfile._FH_FILENAME_LENGTH] + fh[zipfile._FH_EXTRA_FIELD_LENGTH], os.SEEK_CUR)
+    remaining = item.compress_size
+    while remaining > 0:
+        n = fp.readinto(mv[:min(len(mv), remaining)])
+        if not n:
+            raise zipfile.BadZipFile(f"Truncated data for file: {item.filename}")
+        remaining -= n
+        yield mv[:n]
+
+def read_inflated(zin, item, mv):
+    # Yield the decompressed entry data
+    with zin.open(item, 'r') as src:
+        # the writer already CRCs every byte; write_stream checks that against the source CRC
+        # before the entry is committed
+        src._expected_crc = None
+        while True:
+            n = src.readinto(mv)
+            if not n: break
+            yield mv[:n]
+
+# general purpose flag bits (zipfile's _MASK_* names only exist from Python 3.11)
+_FLAG_ENCRYPTED = 0x1
+_FLAG_DATA_DESCRIPTOR = 0x8
+
+def write_raw(zout, item, new_name, chunks, progress):
+    # Copy the compressed payload byte-for-byte: CRC & sizes reused from source
+    zi = zipfile.ZipInfo(new_name, item.date_time)
+    zi.compress_type = item.compress_type
+    zi.create_system = item.create_system
+    zi.external_attr = item.external_attr
+    zi.CRC = item.CRC
+    zi.compress_size = item.compress_size
+    zi.file_size = item.file_size
+    zi.flag_bits = item.flag_bits
+    if not zi.flag_bits & _FLAG_ENCRYPTED:
+        zi.flag_bits &= ~_FLAG_DATA_DESCRIPTOR  # sizes go into the local header
+    # encrypted entries keep bit 3: it decides whether the password check byte is the CRC or the
+    # time, so they get a data descriptor after the payload, as in the source
+    append_entry(zout, zi, chunks, progress)
+
+def append_entry(zout, zi, chunks, progress):
+    # Write a local header for zi (CRC/sizes already known) followed by its compressed data
+    zout._writecheck(zi)
+    zi.header_offset = zout.fp.tell()
+    zip64 = zi.file_size > zipfile.ZIP64_LIMIT or zi.compress_size > zipfile.ZIP64_LIMIT
+    try:
+        zout.fp.write(zi.FileHeader(zip64))
+        copied = done = 0
+        for c in chunks:
+            zout.fp.write(c)
+            copied += len(c)
+            # progress is reported in uncompressed bytes to match the pre-scan totals
+            credited = copied * zi.file_size // zi.compress_size
+            progress(credited - done)
+            done = credited
+        if zi.flag_bits & _FLAG_DATA_DESCRIPTOR:
+            zout.fp.write(struct.pack('<LLQQ' if zip64 else '<LLLL', zipfile._DD_SIGNATURE,
+                                      zi.CRC, zi.compress_size, zi.file_size))
+    except BaseException:
+        discard_entry(zout, zi)
+        raise
+    zout.start_dir = zout.fp.tell()
+    zout.filelist.append(zi)
+    zout.NameToInfo[zi.filename] = zi
+    zout._didModify = True
+
+def discard_entry(zout, zi):
+    # drop a partial or rejected entry so the central directory still lands at the end of the file
+    if zout.filelist and zout.filelist[-1] is zi:
+        zout.filelist.pop()
+        del zout.NameToInfo[zi.filename]
+    zout.fp.seek(zi.header_offset)
+    zout.fp.truncate()
+    zout.start_dir = zi.header_offset
+
+def deflate_small(data, level):
+    # zlib can't reset a compressor, so there is nothing to pool; instead size the window and
+    # hash table to the entry (a few KB) rather than the fixed ~256 KB zipfile allocates per entry
+    zlib = zipfile.zlib  # isal_zlib under --isal
+    wbits = min(15, max(9, len(data).bit_length()))
+    c = zlib.compressobj(level, zlib.DEFLATED, -wbits, wbits - 7)
+    return c.compress(data) + c.flush()
+
+SMALL_ENTRY = 64*1024
+
+def write_stream(zout, item, new_name, chunks, progress):
+    # (Re)compress with the output's compression method; metadata comes from the source entry,
+    # as with passthrough
+    zi = zipfile.ZipInfo(new_name, item.date_time)
+    zi.create_system = item.create_system
+    zi.external_attr = item.external_attr
+    zi.compress_type = zout.compression
+    zi._compresslevel = zout.compresslevel
+    zi.file_size = item.file_size  # lets zout.open('w') pick zip64 up front
+    if item.file_size <= SMALL_ENTRY:
+        data = b"".join(bytes(c) for c in chunks)  # chunks may share one buffer
+        check_crc(item, zipfile.crc32(data))
+        # tiny entries: CRC checked once above, header and data written directly, no _ZipWriteFile
+        zi.CRC = item.CRC
+        zi.file_size = len(data)
+        if zout.compression == zipfile.ZIP_DEFLATED:
+            data = deflate_small(data, -1 if zout.compresslevel is None else zout.compresslevel)
+        zi.compress_size = len(data)
+        append_entry(zout, zi, [data] if data else [], progress)
+    else:
+        dst = zout.open(zi, 'w')
+        try:
+            with dst:
+                for c in chunks:
+                    dst.write(c)
+                    progress(len(c))
+                check_crc(item, dst._crc)  # before close() adds the entry to the central directory
+        except BaseException:
+            discard_entry(zout, zi)
+            raise
+
+def libarchive_entries(zpath, block_size):
+    # (ZipInfo, chunks) from one sequential read of zpath; libarchive inflates.
+    # Entries are paired by position in local-header order, not by name: libarchive may decode
+    # non-UTF-8 names differently from zipfile, and one ZIP can hold the same name twice.
+    with zipfile.ZipFile(zpath, 'r', allowZip64=True) as z:
+        order = sorted(z.infolist(), key=operator.attrgetter("header_offset"))
+    def blocks(entry):
+        try:
+            yield from entry.get_blocks(block_size)
+        except libarchive.ArchiveError as e:
+            raise zipfile.BadZipFile(str(e)) from e
+    pos = 0
+    try:
+        with libarchive.file_reader(zpath) as archive:
+            for entry in archive:
+                if pos == len(order):
+                    print(f"WARNING: {zpath}: skip {entry.pathname!r}, not in the central directory", file=sys.stderr)
+                    continue
+                item = order[pos]
+                pos += 1
+                if not wanted(item): continue  # dirs and junk, as in the pre-scan
+                if entry.size and entry.size != item.file_size:
+                    raise zipfile.BadZipFile(f"libarchive entry {entry.pathname!r} does not line up with {item.filename!r}")
+                yield item, blocks(entry)
+    except libarchive.ArchiveError as e:
+        raise zipfile.BadZipFile(str(e)) from e
+    missing = [it.filename for it in order[pos:] if wanted(it)]
+    if missing:
+        print(f"WARNING: {zpath}: libarchive returned no data for {len(missing)} entries (first: {missing[0]!r})", file=sys.stderr)
+
+def check_crc(item, crc):
+    if crc != item.CRC:
+        raise zipfile.BadZipFile(f"Bad CRC-32 for file {item.filename!r}")
+
+def produce(zpath, raw, items, read_entry, chunk, q, stop):
+    # Reader thread for --jobs: push one input ZIP's entry data to the writer, in infolist order.
+    # None ends an entry, an exception is re-raised on the writer side.
+    # The input is only open while this task runs, so at most --jobs inputs are open at once.
+    mv = memoryview(bytearray(chunk))
+    def put(msg):
+        while not stop.is_set():
+            try:
+                q.put(msg, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    if stop.is_set(): return  # writer already gave up on this ZIP
+    try:
+        with open_input(zpath, raw) as src:
+            for item in items:
+                for c in read_entry(src, item, mv):
+                    if not put(bytes(c)): return
+                if not put(None): return
+    except Exception as e:
+        put(e)
+
+def queued(q):
+    # One entry's chunks as sent by produce()
+    while True:
+        msg = q.get()
+        if msg is None:
+            return
+        if isinstance(msg, Exception):
+            raise msg
+        yield msg
+
+DROP_WINDOW = 64*1024*1024
+
+def fadvise(f, offset, length, advice):
+    # page-cache hint; no-op where posix_fadvise is missing (macOS, Windows)
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(f.fileno(), offset, length, getattr(os, advice))
+        except OSError:
+            pass
+
+def copy_range(f, out, offset, count, buf):
+    # Copy count bytes of f starting at offset to out's current position; returns bytes copied.
+    # Kernel-side first (copy_file_range, then sendfile), user-space loop as the last fallback.
+    src_fd, dst_fd = f.fileno(), out.fileno()
+    copied = 0
+    for fn in ("copy_file_range", "sendfile"):
+        if not hasattr(os, fn): continue
+        try:
+            while copied < count:
+                if fn == "copy_file_range":
+                    n = os.copy_file_range(src_fd, dst_fd, count - copied, offset + copied)
+                else:
+                    n = os.sendfile(dst_fd, src_fd, offset + copied, count - copied)
+                if n == 0: return copied
+                copied += n
+            return copied
+        except OSError as e:
+            if e.errno not in (errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSOCK):
+                raise
+    f.seek(offset + copied)
+    mv = memoryview(buf if buf is not None else bytearray(4*1024*1024))  # concurrent parts: private buffer
+    while copied < count:
+        n = f.readinto(mv[:min(len(mv), count - copied)])
+        if not n: break
+        out.write(mv[:n])
+        copied += n
+    return copied
+
+def split_part(path, part_name, offset, count, buf):
+    # each part has its own source handle, so parts can be copied concurrently
+    with open(path, "rb") as f, open(part_name, "wb", buffering=0) as out:
+        fadvise(f, offset, count, "POSIX_FADV_SEQUENTIAL")
+        copied = copy_range(f, out, offset, count, buf)
+        fadvise(f, offset, count, "POSIX_FADV_DONTNEED")
+    if copied < count:
+        raise OSError(f"Unexpected end of file while splitting {path}")
+    return copied
+
+_SPLIT_BUF = None
+
+def split_buffer(size):
+    # one user-space fallback buffer for the whole process, reused across parts and calls
+    global _SPLIT_BUF
+    if _SPLIT_BUF is None or len(_SPLIT_BUF) < size:
+        _SPLIT_BUF = bytearray(size)
+    return memoryview(_SPLIT_BUF)[:size]
+
+def raw_split(path: str, part_size_str: str, rm_after: bool, jobs: int = 1, buffer_size: int = 4*1024*1024):
     part_size = parse_size(part_size_str)
     if part_size <= 0:
         raise ValueError("split size must > 0")
     total = os.path.getsize(path)
     if total == 0: return
     prefix = path + ".part-"
-    buf = bytearray(4*1024*1024)
-    written = 0
-    idx = 0
-    with open(path, "rb") as f:
-        while written < total:
-            part_name = f"{prefix}{idx:03d}"
-            with open(part_name, "wb") as out:
-                copied = 0
-                to_copy = min(part_size, total - written)
-                while copied < to_copy:
-                    n = f.readinto(buf)
-                    if n <= 0: break
-                    if copied + n > to_copy:
-                        n = to_copy - copied
-                    out.write(buf[:n])
-                    copied += n
-                    written += n
-            print(f"Split part {part_name} ({human(copied)})")
-            idx += 1
+    parts = [(f"{prefix}{idx:03d}", off, min(part_size, total - off))
+             for idx, off in enumerate(range(0, total, part_size))]
+    if jobs > 1:
+        # several copy_file_range calls in flight keep the device queue busy; they run without the GIL
+        with concurrent.futures.ThreadPoolExecutor(jobs) as pool:
+            futs = [pool.submit(split_part, path, name, off, n, None) for name, off, n in parts]
+            for (part_name, _, _), fut in zip(parts, futs):
+                print(f"Split part {part_name} ({human(fut.result())})")
+    else:
+        buf = split_buffer(buffer_size)
+        for part_name, off, n in parts:
+            print(f"Split part {part_name} ({human(split_part(path, part_name, off, n, buf))})")
     if rm_after:
         os.remove(path)
         print(f"Removed original: {path}")
@@ -112,52 +363,91 @@ def raw_split(path: str, part_size_str: str, rm_after: bool):
 
 def main():
     args = parse_args()
+    # check --split-size now: it is only used after the whole merge
+    split_bytes = 0
+    if args.split_size:
+        try:
+            split_bytes = parse_size(args.split_size)
+        except ValueError:
+            pass
+        if split_bytes <= 0:
+            print(f"ERROR: invalid --split-size '{args.split_size}' (e.g. 1900m, 2g)", file=sys.stderr)
+            sys.exit(2)
+        if args.split_mode == "zip":
+            if split_bytes < 64*1024:
+                print("ERROR: --split-mode zip needs --split-size of at least 64k", file=sys.stderr)
+                sys.exit(2)
+            if shutil.which("zip") is None:
+                print("ERROR: 'zip' CLI not found for --split-mode zip", file=sys.stderr)
+                sys.exit(5)
     input_dir = args.input_dir
     out_dir = args.out_dir or (input_dir.rstrip(os.sep) + "_output")
     os.makedirs(out_dir, exist_ok=True)
     output_file = os.path.join(out_dir, args.output_basename + ".zip")
 
+    if args.isal:
+        if isal_zlib is None:
+            print("WARNING: --isal needs python-isal (pip install isal), using zlib", file=sys.stderr)
+        else:
+            use_isal()
+
     comp = zipfile.ZIP_STORED if args.store else zipfile.ZIP_DEFLATED
+    level = args.compresslevel
+    if args.isal and isal_zlib is not None:
+        level = min(level, 3)  # ISA-L only has levels 0-3
     chunk = max(1, args.chunk_mb) * 1024 * 1024
+    passthrough = (not args.store) if args.passthrough is None else args.passthrough
+    backend = args.backend
+    if backend == "libarchive" and libarchive is None:
+        print("WARNING: --backend libarchive needs libarchive-c (pip install libarchive-c), using zipfile", file=sys.stderr)
+        backend = "zipfile"
+    if backend == "libarchive":
+        passthrough = False  # libarchive only hands out inflated data
 
     names = list_zips(input_dir, args.filter)
     if not names:
         print(f"No zip matched '{args.filter}' in {input_dir}", file=sys.stderr)
         sys.exit(4)
 
-    totals = [0]*len(names)
+    # Parse each central directory once: the filtered infolist is reused by the copy phase.
+    # Inputs are not kept open (there may be more ZIPs than the open-file limit).
+    stats = [None]*len(names)
     overall_total = 0
     overall_compressed = 0
     for i, n in enumerate(names):
         p = os.path.join(input_dir, n)
         try:
-            t = zip_uncompressed_size(p)
-            c = zip_compressed_size(p)
+            with zipfile.ZipFile(p, 'r', allowZip64=True) as z:
+                stats[i] = zip_stats(z)
         except zipfile.BadZipFile:
             print(f"WARNING: skip BadZipFile: {p}", file=sys.stderr)
-            t, c = 0, 0
-        totals[i] = t
-        overall_total += t
-        overall_compressed += c
+            continue
+        overall_total += stats[i][1]
+        overall_compressed += stats[i][2]
 
     # ---- Disk space pre-check ----
     free = shutil.disk_usage(out_dir).free
-    if args.store:
+    if passthrough:
+        need = int(overall_compressed * 1.05)
+        reason = "passthrough (no recompression)"
+    elif args.store:
         need = int(overall_total * 1.05)  # ~5% central directory/overhead
         reason = "store (no compression)"
     else:
         # conservative: output should be near compressed size, but cap by uncompressed
-        need = int(min(overall_total, overall_compressed * 1.25) * 1.10)
+        # (fast levels give up to ~40% more than a level-6 source)
+        ratio = 1.40 if args.compresslevel < 6 else 1.25
+        need = int(min(overall_total, overall_compressed * ratio) * 1.10)
         reason = "deflate (recompression)"
     if free < need:
         print(f"ERROR: Not enough free space in {out_dir}. Need ~{need/1024/1024/1024:.1f} GB (mode={reason}), free {free/1024/1024/1024:.1f} GB.", file=sys.stderr)
         sys.exit(8)
 
 
-    seen = {}
+    seen = collections.defaultdict(int)
     overall_done = 0
-    last_overall_pct = -1
-    start = time.time()
+    last_tick = 0.0
+    start = time.monotonic()
 
     def map_target(zname, inner):
         inner = inner.lstrip("/\\")
@@ -165,89 +455,144 @@ def main():
             base = f"{os.path.splitext(zname)[0]}/{inner}"
         else:
             base = inner
-        target = base
-        cnt = seen.get(base, 0)
-        if cnt > 0:
-            root, ext = os.path.splitext(base)
-            target = f"{root}__dup{cnt}{ext}"
+        cnt = seen[base]
         seen[base] = cnt + 1
-        return target
+        if not cnt:
+            return base
+        # same split as os.path.splitext on '/' paths (leading dots are not an extension)
+        dot = base.rfind(".")
+        name_at = base.rfind("/") + 1
+        if dot > name_at and base[name_at:dot].lstrip("."):
+            return f"{base[:dot]}__dup{cnt}{base[dot:]}"
+        return f"{base}__dup{cnt}"
+
+    out_fd, out_enc = sys.stdout.fileno(), sys.stdout.encoding or "utf-8"
 
     def print_line(msg):
-        sys.stdout.write(msg + "\r")
-        sys.stdout.flush()
+        # straight to the fd: no TextIOWrapper encode/lock/flush per redraw
+        # (lines printed via print() are flushed first so the order is kept)
+        os.write(out_fd, (msg + "\r").encode(out_enc, "replace"))
+
+    def advance(blen):
+        nonlocal done_zip, overall_done, last_tick
+        done_zip += blen
+        overall_done += blen
+        # redraw at most ~10 Hz: keep formatting and stdout writes out of the per-chunk path
+        now = time.monotonic()
+        if now - last_tick < 0.1:
+            return
+        last_tick = now
+        zip_pct = 100 if total_zip == 0 else int(done_zip*100//total_zip)
+        overall_pct = 100 if overall_total == 0 else int(overall_done*100//overall_total)
+        elapsed = now - start
+        eta_str = "--:--:--"
+        if elapsed > 0 and overall_done > 0 and overall_total > overall_done:
+            speed = overall_done/elapsed
+            if speed > 0:
+                eta = (overall_total-overall_done)/speed
+                eta_str = hms(eta)
+        print_line(f"[{idx}/{len(names)}] {zname}: {zip_pct:3d}% ({human(done_zip)}/{human(total_zip)})"
+                   f"  |  Overall: {overall_pct:3d}% ({human(overall_done)}/{human(overall_total)})"
+                   f"  |  Elapsed {hms(elapsed)}  ETA {eta_str}")
+
+    # one reusable I/O buffer for every entry instead of a fresh bytes object per read
+    mv = memoryview(bytearray(chunk))
+    read_entry = read_raw if passthrough else read_inflated
+    write_entry = write_raw if passthrough else write_stream
+
+    stack = contextlib.ExitStack()
+    with stack, zipfile.ZipFile(output_file, 'w', compression=comp, compresslevel=level, allowZip64=True) as zout:
+        # --jobs: reader threads read/inflate whole input ZIPs ahead, the writer (this thread)
+        # drains their queues in input order, so output order and __dupN naming stay deterministic
+        readers = {}
+        dropped = 0
+        if args.jobs > 1 and backend == "zipfile":
+            pool = stack.enter_context(concurrent.futures.ThreadPoolExecutor(args.jobs))
+            stack.callback(pool.shutdown, cancel_futures=True)  # tasks not yet started never run
+            def stop_readers():
+                for _, stop in readers.values():
+                    stop.set()
+            stack.callback(stop_readers)  # runs before the pool is joined
+            for i, zname in enumerate(names):
+                if stats[i] is None: continue
+                zpath = os.path.join(input_dir, zname)
+                q, stop = queue.Queue(maxsize=2), threading.Event()
+                readers[zpath] = (q, stop)
+                pool.submit(produce, zpath, passthrough, stats[i][0], read_entry, chunk, q, stop)
 
-    with zipfile.ZipFile(output_file, 'w', compression=comp, allowZip64=True) as zout:
         for idx, zname in enumerate(names, 1):
+            if stats[idx-1] is None: continue
             zpath = os.path.join(input_dir, zname)
+            src_stack = contextlib.ExitStack()
             try:
-                with zipfile.ZipFile(zpath, 'r', allowZip64=True) as zin:
-                    total_zip = totals[idx-1]
-                    done_zip = 0
-                    last_zip_pct = -1
-
-                    for item in zin.infolist():
-                        if item.is_dir(): continue
-                        fn = item.filename
-                        if fn.startswith("__MACOSX/") or fn.endswith(".DS_Store"): continue
-                        new_name = map_target(zname, fn)
-                        with zin.open(item, 'r') as src, zout.open(new_name, 'w') as dst:
-                            while True:
-                                buf = src.read(chunk)
-                                if not buf: break
-                                dst.write(buf)
-                                blen = len(buf)
-                                done_zip += blen
-                                overall_done += blen
-                                zip_pct = 100 if total_zip == 0 else int(done_zip*100//total_zip)
-                                overall_pct = 100 if overall_total == 0 else int(overall_done*100//overall_total)
-                                elapsed = time.time() - start
-                                eta_str = "--:--:--"
-                                if elapsed > 0 and overall_done > 0 and overall_total > overall_done:
-                                    speed = overall_done/elapsed
-                                    if speed > 0:
-                                        eta = (overall_total-overall_done)/speed
-                                        eta_str = hms(eta)
-                                if zip_pct != last_zip_pct or overall_pct != last_overall_pct:
-                                    last_zip_pct = zip_pct
-                                    last_overall_pct = overall_pct
-                                    print_line(f"[{idx}/{len(names)}] {zname}: {zip_pct:3d}% ({human(done_zip)}/{human(total_zip)})"
-                                               f"  |  Overall: {overall_pct:3d}% ({human(overall_done)}/{human(overall_total)})"
-                                               f"  |  Elapsed {hms(elapsed)}  ETA {eta_str}")
-                    # finalize line
-                    elapsed = time.time() - start
-                    overall_pct = 100 if overall_total == 0 else int(overall_done*100//overall_total)
-                    eta_str = "--:--:--"
-                    if overall_done < overall_total and elapsed > 0 and overall_done > 0:
-                        speed = overall_done/elapsed
-                        if speed > 0:
-                            eta = (overall_total-overall_done)/speed
-                            eta_str = hms(eta)
-                    print(f"[{idx}/{len(names)}] {zname}: 100% ({human(total_zip)}/{human(total_zip)})"
-                          f"  |  Overall: {overall_pct:3d}% ({human(overall_done)}/{human(overall_total)})"
-                          f"  |  Elapsed {hms(elapsed)}  ETA {eta_str}")
-            except zipfile.BadZipFile:
-                print(f"WARNING: skip BadZipFile: {zpath}", file=sys.stderr)
+                infos, total_zip = stats[idx-1][:2]
+                done_zip = 0
+
+                if backend == "libarchive":
+                    work = ((it, map_target(zname, it.filename), blocks)
+                            for it, blocks in libarchive_entries(zpath, chunk))
+                else:
+                    src = None if readers else src_stack.enter_context(open_input(zpath, passthrough))
+                    # lazy: a name is only taken in `seen` when its entry is about to be written,
+                    # so a ZIP skipped halfway doesn't leave __dupN gaps for later inputs
+                    work = ((it, map_target(zname, it.filename),
+                             queued(readers[zpath][0]) if readers else read_entry(src, it, mv))
+                            for it in infos)
+                for item, new_name, chunks in work:
+                    write_entry(zout, item, new_name, chunks, advance)
+                    # let the kernel write back and drop output pages we won't touch again
+                    # (entries are final once written; keep the last DROP_WINDOW cached)
+                    end = zout.fp.tell() - DROP_WINDOW
+                    if end - dropped >= DROP_WINDOW:
+                        fadvise(zout.fp, dropped, end - dropped, "POSIX_FADV_DONTNEED")
+                        dropped = end
+                # finalize line
+                elapsed = time.monotonic() - start
+                overall_pct = 100 if overall_total == 0 else int(overall_done*100//overall_total)
+                eta_str = "--:--:--"
+                if overall_done < overall_total and elapsed > 0 and overall_done > 0:
+                    speed = overall_done/elapsed
+                    if speed > 0:
+                        eta = (overall_total-overall_done)/speed
+                        eta_str = hms(eta)
+                print(f"[{idx}/{len(names)}] {zname}: 100% ({human(total_zip)}/{human(total_zip)})"
+                      f"  |  Overall: {overall_pct:3d}% ({human(overall_done)}/{human(overall_total)})"
+                      f"  |  Elapsed {hms(elapsed)}  ETA {eta_str}", flush=True)
+            except zipfile.BadZipFile as e:
+                print(f"WARNING: skip BadZipFile: {zpath} ({e})", file=sys.stderr)
+            finally:
+                src_stack.close()
+                if readers:
+                    readers[zpath][1].set()
 
     print(f"Hoàn tất! Tạo: {output_file}")
-    print(f"Total time: {hms(time.time()-start)}")
+    print(f"Total time: {hms(time.monotonic()-start)}")
 
     # Optional split
     if args.split_size:
         if args.split_mode == "raw":
-            raw_split(output_file, args.split_size, args.rm_after_split)
+            raw_split(output_file, args.split_size, args.rm_after_split, args.jobs, chunk)
         else:
-            # zip-split via external 'zip' CLI
-            if shutil.which("zip") is None:
-                print("ERROR: 'zip' CLI not found for --split-mode zip", file=sys.stderr)
-                sys.exit(5)
-            split_base = os.path.join(out_dir, args.output_basename + "-split.zip")
-            print(f"Splitting via 'zip -s {args.split_size}' -> {split_base} (+ .z01, .z02, ...)")
-            subprocess.run(["zip","-s", args.split_size, output_file, "--out", split_base], check=True)
-            print(f"Done split: {split_base}")
+            # zip-split via external 'zip' CLI; it takes whole k/m/g only (a bare number means MB),
+            # so hand it the parsed size in KB
+            zip_size = f"{split_bytes // 1024}k"
+            # 'zip -s' cannot split in place: it writes a complete second copy (~2x disk while running)
+            if args.rm_after_split:
+                split_base = os.path.join(out_dir, args.output_basename + ".split-tmp.zip")
+            else:
+                split_base = os.path.join(out_dir, args.output_basename + "-split.zip")
+            print(f"Splitting via 'zip -s {zip_size}' -> {split_base} (+ .z01, .z02, ...)")
+            subprocess.run(["zip","-s", zip_size, output_file, "--out", split_base], check=True,
+                           stdout=subprocess.DEVNULL)
             if args.rm_after_split:
                 os.remove(output_file)
                 print(f"Removed original: {output_file}")
+                # same directory -> plain renames: the split set takes over <output_basename>.zip/.zNN
+                tmp_root, final_root = split_base[:-len(".zip")], output_file[:-len(".zip")]
+                for part in sorted(glob.glob(glob.escape(tmp_root) + ".z[0-9][0-9]*")) + [split_base]:
+                    os.rename(part, final_root + part[len(tmp_root):])
+                split_base = output_file
+            print(f"Done split: {split_base}")
 
 if __name__ == "__main__":
     main()